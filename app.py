@@ -5,28 +5,232 @@ import os
 from datetime import datetime
 import tempfile
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.profiler import ProfilerMiddleware
+from werkzeug.middleware.proxy_fix import ProxyFix
 import sys
 import traceback
+import uuid
+import threading
+import time
+import hmac
+import gzip
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from test_case_generator import get_ai_provider, AI_CONFIG, generate_test_cases, parse_markdown_table, save_to_excel
+from test_case_generator import get_ai_provider, SPLIT_CONFIG, get_routed_provider, route_story, PROVIDER_NAMES, AI_CONFIG, RISK_LEVELS, _risk_bucket, parse_test_cases, is_structured_response, save_to_excel, TestCaseBatch, compute_test_case_stats, generation_key, GENERATION_FLIGHTS, generate_with_provider, concurrency_stats, ProviderResponse, probe_provider, provider_configured
+from shared_store import SharedStore, DEFAULT_STORE_PATH
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Responses are gzip-compressed only
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# State shared by every worker process (response cache, rate limits, results)
+app.config['SHARED_STORE_PATH'] = os.environ.get('SHARED_STORE_PATH', DEFAULT_STORE_PATH)
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 3600))  # Seconds; 0 disables the cache
+app.config['RATE_LIMIT_PER_MINUTE'] = int(os.environ.get('RATE_LIMIT_PER_MINUTE', 30))  # Generations per client; 0 disables
+# Reverse proxies in front of the app (e.g. the Azure App Service front end) whose X-Forwarded-* headers
+# are trusted, so rate limits apply per client rather than per proxy address; 0 when clients connect directly
+app.config['TRUSTED_PROXY_HOPS'] = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+app.config['RESULT_TTL'] = int(os.environ.get('RESULT_TTL', 24 * 3600))  # Seconds results stay pageable via /api/results
+app.config['HEALTH_PROBE_INTERVAL'] = int(os.environ.get('HEALTH_PROBE_INTERVAL', 300))  # Seconds between provider probes; 0 disables
+# Requests sending this token in an X-Profile header are profiled; unset disables request profiling
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN', '')
+# Smallest response body worth compressing, in bytes; 0 disables response compression
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'test_case_generator_profiles'))
+
+# Opt-in JSON test case records from the providers instead of markdown tables
+AI_CONFIG['structured_output'] = os.environ.get('STRUCTURED_OUTPUT', '').lower() in ('1', 'true', 'yes')
+# Serve local rule-based test cases when the selected provider fails or is rate limited
+AI_CONFIG['local']['fallback'] = os.environ.get('LOCAL_FALLBACK', '').lower() in ('1', 'true', 'yes')
+# Split stories with many acceptance criteria into chunks generated in parallel
+SPLIT_CONFIG['enabled'] = os.environ.get('SPLIT_STORIES', '').lower() in ('1', 'true', 'yes')
+# Route simple stories to each provider's fast model
+AI_CONFIG['routing']['enabled'] = os.environ.get('MODEL_ROUTING', '').lower() in ('1', 'true', 'yes')
+# Simulated response time and table size of the mock provider, e.g. for load_test.py
+AI_CONFIG['mock']['delay'] = float(os.environ.get('MOCK_DELAY', AI_CONFIG['mock']['delay']))
+AI_CONFIG['mock']['rows'] = int(os.environ.get('MOCK_ROWS', AI_CONFIG['mock']['rows']))
+
 # Ensure templates and static directories exist
 os.makedirs('templates', exist_ok=True)
 os.makedirs('static', exist_ok=True)
 os.makedirs('static/css', exist_ok=True)
 os.makedirs('static/js', exist_ok=True)
 
+store = SharedStore(app.config['SHARED_STORE_PATH'])
+
+if app.config['TRUSTED_PROXY_HOPS']:
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
+class HeaderProfilerMiddleware:
+    """WSGI middleware that profiles only the requests carrying the profiling token in an X-Profile header"""
+    def __init__(self, wsgi_app, token, profile_dir):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        # Prints the top functions and writes a .prof file per profiled request
+        self.profiler = ProfilerMiddleware(wsgi_app, sort_by=('cumulative',), restrictions=(30,), profile_dir=profile_dir)
+
+    def __call__(self, environ, start_response):
+        # WSGI headers are latin-1 decoded; compare raw bytes, as compare_digest rejects non-ASCII str
+        if hmac.compare_digest(environ.get('HTTP_X_PROFILE', '').encode('latin-1'), self.token.encode()):
+            return self.profiler(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+# Only installed when enabled, so requests are not wrapped at all otherwise
+if app.config['PROFILE_TOKEN']:
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+    app.wsgi_app = HeaderProfilerMiddleware(app.wsgi_app, app.config['PROFILE_TOKEN'], app.config['PROFILE_DIR'])
+
+# Most recent parsed results kept, paged through /api/results/<id> and used by /api/stats
+MAX_RECENT_RESULTS = 1000
+
+# Page sizes for /api/results/<id>
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def record_result(story_id, story_title, batch):
+    """Store a generation's parsed test cases server-side and return its result id"""
+    result_id = uuid.uuid4().hex
+    store.set("results", result_id, {
+        "result_id": result_id,
+        "story_id": story_id,
+        "story_title": story_title,
+        "rows": [list(row) for row in batch.rows()]
+    }, ttl=app.config['RESULT_TTL'] or None)
+    store.trim("results", MAX_RECENT_RESULTS)
+    return result_id
+
+def recent_results():
+    """Load the latest result of each recently generated story from the shared store in save_to_excel format"""
+    latest = {}
+    for result in store.values("results"):
+        latest[result["story_id"]] = result
+    return [{
+        "story_id": result["story_id"],
+        "story_title": result["story_title"],
+        "test_cases": TestCaseBatch.from_rows(result["rows"])
+    } for result in latest.values()]
+
+def result_page(result, batch, matching, page, page_size):
+    """Build one page of a stored result's (filtered) test cases, with the values available to filter on"""
+    start = (page - 1) * page_size
+    return {
+        'result_id': result["result_id"],
+        'story_id': result["story_id"],
+        'story_title': result["story_title"],
+        'total_cases': len(batch),
+        'total': len(matching),
+        'page': page,
+        'page_size': page_size,
+        'pages': (len(matching) + page_size - 1) // page_size,
+        'facets': {
+            'risk_levels': [level for level in RISK_LEVELS + ["Unknown"]
+                            if level in set(map(_risk_bucket, batch.column("Risk Level")))],
+            'priorities': sorted(set(batch.column("Priority"))),
+            'areas': sorted(set(batch.column("Area/Feature")))
+        },
+        'test_cases': batch.select(matching[start:start + page_size]).to_records()
+    }
+
+def probe_providers():
+    """Probe every configured provider whose cached health is older than the probe interval and cache the results"""
+    interval = app.config['HEALTH_PROBE_INTERVAL']
+    # Another worker process may have probed a provider recently
+    due = [name for name in PROVIDER_NAMES if provider_configured(name)
+           and time.time() - (store.get("health", name) or {}).get('checked_at', 0) >= interval]
+    # Probe concurrently so one unresponsive API does not delay the others
+    with ThreadPoolExecutor(max_workers=len(due) or 1) as executor:
+        for health in executor.map(probe_provider, due):
+            store.set("health", health['provider'], health)
+            print(f"Debug: Provider {health['provider']} is {health['status']} ({health['latency']}s)")
+
+def run_health_prober():
+    """Background loop keeping the cached provider health served by /healthz and /api/providers fresh"""
+    while True:
+        try:
+            probe_providers()
+        except Exception as e:
+            print(f"Debug: Provider health probe failed: {e}")
+        time.sleep(app.config['HEALTH_PROBE_INTERVAL'])
+
+def provider_health():
+    """Cached health of each provider, None for providers not probed yet"""
+    return {name: store.get("health", name) if provider_configured(name) else {'provider': name, 'status': 'unconfigured'}
+            for name in PROVIDER_NAMES}
+
+health_prober_lock = threading.Lock()
+health_prober_started = False
+
+@app.before_request
+def start_health_prober():
+    """Start the background health prober with the first request served by this process, not at import"""
+    global health_prober_started
+    if health_prober_started or not app.config['HEALTH_PROBE_INTERVAL']:
+        return
+    with health_prober_lock:
+        if not health_prober_started:
+            threading.Thread(target=run_health_prober, name="health-prober", daemon=True).start()
+            health_prober_started = True
+
+def rate_limited(client_id):
+    """Count a generation request for a client and report whether it is over the per-minute limit"""
+    limit = app.config['RATE_LIMIT_PER_MINUTE']
+    if not limit:
+        return False
+    return store.incr("rate_limit", client_id, 60) > limit
+
+# Response types compressed by compress_response(); Excel exports are already zip-compressed
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript', 'text/javascript'}
+
+# Top-level /api/generate response keys always returned, whatever `fields` selects
+GENERATE_REQUIRED_FIELDS = ('success', 'story_id')
+
+@app.after_request
+def compress_response(response):
+    """Compress text and JSON responses with brotli or gzip, whichever the client accepts"""
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    if (not min_size or response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or not 200 <= response.status_code < 300):
+        return response
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+    body = response.get_data()
+    if encoding is None or len(body) < min_size:
+        return response
+    
+    if encoding == 'br':
+        body = brotli.compress(body, quality=4)  # Fast levels suit dynamic responses
+    else:
+        body = gzip.compress(body, compresslevel=6)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def cacheable_json(data, max_age):
+    """JSON response with a weak ETag (valid for every encoding), answered with 304 when the client's copy is current"""
+    response = jsonify(data)
+    response.cache_control.public = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True  # Revalidate every time, but skip the body when unchanged
+    response.add_etag(weak=True)
+    return response.make_conditional(request)
+
 def make_json_serializable(obj):
     """Convert objects to JSON serializable format"""
     if obj is None:
         return None
+    elif isinstance(obj, TestCaseBatch):
+        return obj.to_records()
     elif isinstance(obj, pd.DataFrame):
         try:
             return obj.to_dict('records')
@@ -115,9 +319,22 @@ def api_generate():
         user_story = data.get('user_story', '')
         acceptance_criteria = data.get('acceptance_criteria', '')
         ai_provider = data.get('ai_provider', 'gemini')
+        # With page_size, parsed_cases holds only the first page; the rest is paged from /api/results/<id>
+        page_size = data.get('page_size')
+        if page_size is not None:
+            try:
+                page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'page_size must be an integer'}), 400
+        # Comma-separated response keys to return, e.g. "parsed_cases" for rows only or "test_cases" for raw text
+        fields = request.args.get('fields') or data.get('fields')
+        if isinstance(fields, str):
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
         
         if not user_story.strip():
             return jsonify({'error': 'User story is required'}), 400
+        if ai_provider not in PROVIDER_NAMES:
+            return jsonify({'error': f'Unknown AI provider {ai_provider}'}), 400
         
         # Combine user story and acceptance criteria
         full_story = f"{user_story}\n\nAcceptance Criteria:\n{acceptance_criteria}"
@@ -125,46 +342,70 @@ def api_generate():
         print(f"Debug: Using AI provider: {ai_provider}")
         print(f"Debug: Full story length: {len(full_story)}")
         
-        # Get AI provider
-        try:
-            provider = get_ai_provider(ai_provider)
-            if not provider:
-                return jsonify({'error': f'AI provider {ai_provider} not available'}), 400
-        except Exception as e:
-            print(f"Debug: Error getting AI provider: {e}")
-            traceback.print_exc()
-            return jsonify({'error': f'Failed to initialize AI provider: {str(e)}'}), 500
+        if rate_limited(request.remote_addr or 'unknown'):
+            return jsonify({'error': 'Rate limit exceeded, please retry in a minute'}), 429
         
-        # Generate test cases
-        try:
-            print("Debug: Generating test cases...")
-            test_cases = provider.generate_test_cases(full_story, story_id)
-            print(f"Debug: Test cases generated, length: {len(test_cases) if test_cases else 0}")
+        # Serve identical requests from the shared response cache
+        cache_key = generation_key(ai_provider, full_story, story_id)
+        test_cases = store.get("responses", cache_key) if app.config['RESPONSE_CACHE_TTL'] else None
+        if test_cases:
+            print("Debug: Serving test cases from response cache")
+            routing = route_story(ai_provider, full_story) if AI_CONFIG['routing']['enabled'] else None
+        else:
+            # Get AI provider, using the model the story's complexity is routed to
+            try:
+                provider, routing = get_routed_provider(ai_provider, full_story)
+                if not provider:
+                    return jsonify({'error': f'AI provider {ai_provider} not available'}), 400
+            except Exception as e:
+                print(f"Debug: Error getting AI provider: {e}")
+                traceback.print_exc()
+                return jsonify({'error': f'Failed to initialize AI provider: {str(e)}'}), 500
             
-            if not test_cases:
-                return jsonify({'error': 'Failed to generate test cases'}), 500
-        except Exception as e:
-            print(f"Debug: Error generating test cases: {e}")
-            traceback.print_exc()
-            return jsonify({'error': f'Failed to generate test cases: {str(e)}'}), 500
+            # Generate test cases
+            try:
+                print("Debug: Generating test cases...")
+                # Identical requests in flight are coalesced, calls run under the provider's adaptive
+                # concurrency limit and large stories are split into parallel sub-prompts
+                test_cases = generate_with_provider(ai_provider, provider, full_story, story_id)
+                print(f"Debug: Test cases generated, length: {len(test_cases) if test_cases else 0}")
+                
+                if not test_cases:
+                    return jsonify({'error': 'Failed to generate test cases'}), 500
+            except Exception as e:
+                print(f"Debug: Error generating test cases: {e}")
+                traceback.print_exc()
+                return jsonify({'error': f'Failed to generate test cases: {str(e)}'}), 500
+            
+            # Fallback tables are not cached, so the next request retries the provider
+            if app.config['RESPONSE_CACHE_TTL'] and not getattr(test_cases, 'fallback', False):
+                store.set("responses", cache_key, test_cases, ttl=app.config['RESPONSE_CACHE_TTL'])
         
         # Parse markdown table if present
         try:
-            parsed_cases = parse_markdown_table(test_cases)
+            parsed_cases = parse_test_cases(test_cases)
             print(f"Debug: Markdown parsed successfully")
-            print(f"Debug: Parsed cases type: {type(parsed_cases)}")
-            if parsed_cases is not None:
-                print(f"Debug: Parsed cases shape: {parsed_cases.shape if hasattr(parsed_cases, 'shape') else 'No shape'}")
             
-            # Convert DataFrame to JSON-serializable format if it exists
+            # Convert the batch to JSON-serializable records if it exists
+            result_id = None
+            first_page = None
+            total_cases = 0
             if parsed_cases is not None:
-                try:
-                    # Convert DataFrame to records (list of dictionaries)
-                    parsed_cases = parsed_cases.to_dict('records')
-                    print(f"Debug: Converted DataFrame to {len(parsed_cases)} records")
-                except Exception as convert_error:
-                    print(f"Debug: Error converting DataFrame: {convert_error}")
-                    parsed_cases = None
+                result_id = record_result(story_id, story_title, parsed_cases)
+                total_cases = len(parsed_cases)
+                if page_size:
+                    first_page = result_page({"result_id": result_id, "story_id": story_id, "story_title": story_title},
+                                             parsed_cases, list(range(total_cases)), 1, page_size)
+                # Structured responses are shown and copied as a markdown table like the others
+                if is_structured_response(test_cases):
+                    usage = test_cases if isinstance(test_cases, ProviderResponse) else None
+                    test_cases = ProviderResponse(parsed_cases.to_markdown(), getattr(usage, 'input_tokens', None),
+                                                  getattr(usage, 'output_tokens', None), getattr(usage, 'finish_reason', None))
+                if fields and 'parsed_cases' not in fields:
+                    parsed_cases = []  # Not returned, skip converting the rows
+                else:
+                    parsed_cases = first_page['test_cases'] if first_page else parsed_cases.to_records()
+                print(f"Debug: Converted batch to {len(parsed_cases)} records")
             else:
                 print("Debug: No parsed cases to convert")
                 
@@ -172,6 +413,9 @@ def api_generate():
             print(f"Debug: Error parsing markdown: {e}")
             traceback.print_exc()
             parsed_cases = None
+            result_id = None
+            first_page = None
+            total_cases = 0
         
         # Ensure all data is JSON serializable
         try:
@@ -183,10 +427,19 @@ def api_generate():
                 'success': True,
                 'test_cases': test_cases,
                 'parsed_cases': safe_parsed_cases if safe_parsed_cases is not None else [],
+                'result_id': result_id,
+                'total_cases': total_cases,
+                'facets': first_page['facets'] if first_page else None,
                 'story_id': story_id,
                 'story_title': story_title,
+                'usage': test_cases.usage() if isinstance(test_cases, ProviderResponse) else None,
+                'fallback': getattr(test_cases, 'fallback', False),
+                'routing': routing,
                 'timestamp': datetime.now().isoformat()
             }
+            if fields:
+                test_response = {key: value for key, value in test_response.items()
+                                 if key in fields or key in GENERATE_REQUIRED_FIELDS}
             
             # Test if we can serialize this
             json.dumps(test_response)
@@ -237,18 +490,18 @@ def api_export():
             temp_file_path = tmp_file.name
             
             try:
-                # Parse the test cases to get a DataFrame
-                parsed_df = parse_markdown_table(test_cases)
+                # Parse the test cases to get a TestCaseBatch
+                parsed_batch = parse_test_cases(test_cases)
                 
-                if parsed_df is not None:
+                if parsed_batch is not None:
                     # Format data as expected by save_to_excel
                     export_data = [{
                         "story_id": story_id,
                         "story_title": story_title,
-                        "test_cases": parsed_df
+                        "test_cases": parsed_batch
                     }]
                     
-                    print(f"Debug: Exporting {len(export_data)} stories with {len(parsed_df)} test cases")
+                    print(f"Debug: Exporting {len(export_data)} stories with {len(parsed_batch)} test cases")
                     save_to_excel(export_data, tmp_file.name)
                 else:
                     # Fallback: create a simple Excel file with raw text
@@ -333,29 +586,90 @@ def create_simple_excel(test_cases, story_id, story_title, filename):
     wb.save(filename)
     print(f"Debug: Simple Excel file created: {filename}")
 
+@app.route('/api/results/<result_id>')
+def api_results(result_id):
+    """API endpoint for a page of a stored result, filterable by risk_level, priority and area"""
+    result = store.get("results", result_id)
+    if result is None:
+        return jsonify({'error': 'Result not found or expired'}), 404
+    
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = min(max(int(request.args.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'page and page_size must be integers'}), 400
+    
+    batch = TestCaseBatch.from_rows(result["rows"])
+    matching = batch.where(
+        risk_level=request.args.get('risk_level'),
+        priority=request.args.get('priority'),
+        area=request.args.get('area')
+    )
+    return jsonify(result_page(result, batch, matching, page, page_size))
+
 @app.route('/api/providers')
 def api_providers():
     """API endpoint for getting available AI providers"""
     try:
-        providers = list(AI_CONFIG.keys())
+        providers = [name for name in PROVIDER_NAMES if name in AI_CONFIG]
         current = AI_CONFIG.get('provider', 'gemini')
         print(f"Debug: Available providers: {providers}, Current: {current}")
-        return jsonify({
+        # Health changes between probes, so clients revalidate every time
+        return cacheable_json({
             'providers': providers,
-            'current': current
-        })
+            'current': current,
+            'health': provider_health()
+        }, max_age=0)
     except Exception as e:
         print(f"Debug: Error in api_providers: {e}")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stats')
+def api_stats():
+    """API endpoint for risk and coverage statistics across recently generated stories"""
+    try:
+        stats = compute_test_case_stats(recent_results())
+        return jsonify(make_json_serializable(stats.to_dict()))
+    except Exception as e:
+        print(f"Debug: Error in api_stats: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics')
+def api_metrics():
+    """API endpoint for monitoring counters of this worker process"""
+    return jsonify({
+        'pid': os.getpid(),
+        'coalescing': GENERATION_FLIGHTS.stats(),
+        'concurrency': concurrency_stats()
+    })
+
+@app.route('/healthz')
+def healthz():
+    """Health check for load balancers and uptime monitors, answered from cached state without calling any provider"""
+    try:
+        health = provider_health()
+    except Exception as e:
+        print(f"Debug: Error in healthz: {e}")
+        return jsonify({'status': 'error', 'error': str(e)}), 503
+    current = AI_CONFIG.get('provider', 'gemini')
+    # The app still serves requests (e.g. cached or fallback results) when its provider is down
+    status = 'degraded' if (health.get(current) or {}).get('status') == 'down' else 'ok'
+    return jsonify({
+        'status': status,
+        'pid': os.getpid(),
+        'current': current,
+        'providers': health
+    })
+
 @app.route('/api/examples')
 def api_examples():
     """API endpoint for getting example user stories"""
     try:
         from test_case_generator import EXAMPLE_STORIES
         print(f"Debug: Loaded {len(EXAMPLE_STORIES)} example stories")
-        return jsonify({'examples': EXAMPLE_STORIES})
+        return cacheable_json({'examples': EXAMPLE_STORIES}, max_age=3600)
     except Exception as e:
         print(f"Debug: Error in api_examples: {e}")
         traceback.print_exc()
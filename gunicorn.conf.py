@@ -0,0 +1,22 @@
+# Production server configuration: gunicorn --config gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Several worker processes, each with a few threads since requests mostly wait on the AI provider.
+# Caches, rate limits and results live in the SQLite shared store (SHARED_STORE_PATH), not per process.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# A gthread worker keeps accepting connections up to worker_connections and queues them on its own threads;
+# capping it at the thread count lets idle workers pick up the rest instead.
+worker_connections = threads
+
+# AI generations can take minutes for large stories
+timeout = 600
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
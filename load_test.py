@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Load test for the web app with the deterministic mock provider.
+
+Starts app.py (Flask threaded server or gunicorn) with the mock AI provider,
+drives a mix of /api/generate, /api/export and /api/providers requests from
+concurrent clients, and reports throughput, p50/p95/p99 latency per endpoint
+and the server's memory use. No live LLM or API key is needed.
+
+    python load_test.py --concurrency 32 --duration 30 --mock-delay 0.5
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENDPOINTS = ["generate", "export", "providers"]
+
+def free_port():
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(server, port, mock_delay, mock_rows, store_path):
+    """Start the app with the mock provider and wait until /healthz answers."""
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        MOCK_DELAY=str(mock_delay),
+        MOCK_ROWS=str(mock_rows),
+        SHARED_STORE_PATH=store_path,
+        ENABLE_MOCK_PROVIDER="1",
+        # Every request should reach the provider and none should be throttled
+        RESPONSE_CACHE_TTL="0",
+        RATE_LIMIT_PER_MINUTE="0",
+        HEALTH_PROBE_INTERVAL="0",
+        PYTHONUNBUFFERED="1"
+    )
+    if server == "gunicorn":
+        command = ["gunicorn", "--config", "gunicorn.conf.py", "app:app"]
+    else:
+        command = [sys.executable, "-c",
+                   f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    process = subprocess.Popen(command, cwd=APP_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/healthz", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not become ready within 60s")
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and its descendants (Linux /proc), or None if unavailable."""
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except OSError:
+        return total or None
+    return total
+
+class MemorySampler:
+    """Samples the server's memory in the background, keeping the first, peak and last values."""
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.start = self.peak = self.end = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            rss = process_tree_rss(self.pid)
+            if rss is not None:
+                if self.start is None:
+                    self.start = rss
+                self.peak = max(self.peak or 0, rss)
+                self.end = rss
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+def story_payload(number, criteria):
+    """A distinct story per request, so no request is served by coalescing another."""
+    return {
+        "story_id": f"LT{number:05d}",
+        "story_title": f"Load test story {number}",
+        "user_story": f"As a user, I want feature {number} so that I can complete my task.",
+        "acceptance_criteria": "\n".join(f"{index}. Requirement {index} of feature {number} is met"
+                                         for index in range(1, criteria + 1)),
+        "ai_provider": "mock"
+    }
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def run_load(base_url, concurrency, duration, mix, criteria, seed):
+    """Drive the endpoint mix from `concurrency` clients for `duration` seconds; returns (samples, elapsed)."""
+    # A generated table to export, as the web UI would send back
+    response = requests.post(f"{base_url}/api/generate", json=story_payload(0, criteria), timeout=120)
+    response.raise_for_status()
+    export_table = response.json()["test_cases"]
+
+    samples = []  # (endpoint, latency seconds, ok)
+    lock = threading.Lock()
+    counter = iter(range(1, 10 ** 9))
+    endpoints, weights = zip(*mix.items())
+    started = time.monotonic()
+    deadline = started + duration
+
+    def client(client_num):
+        rng = random.Random(seed + client_num)
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            endpoint = rng.choices(endpoints, weights)[0]
+            request_started = time.perf_counter()
+            try:
+                if endpoint == "generate":
+                    with lock:
+                        number = next(counter)
+                    result = session.post(f"{base_url}/api/generate", json=story_payload(number, criteria), timeout=300)
+                elif endpoint == "export":
+                    result = session.post(f"{base_url}/api/export", timeout=300, json={
+                        "test_cases": export_table, "story_id": "LT00000", "story_title": "Load test export"})
+                else:
+                    result = session.get(f"{base_url}/api/providers", timeout=300)
+                result.content  # Read the whole body
+                ok = result.status_code == 200
+            except requests.RequestException:
+                ok = False
+            latency = time.perf_counter() - request_started
+            with lock:
+                samples.append((endpoint, latency, ok))
+
+    threads = [threading.Thread(target=client, args=(client_num,)) for client_num in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.monotonic() - started
+
+def summarize(samples, elapsed):
+    """Requests, errors, throughput and latency percentiles per endpoint and overall."""
+    summary = {}
+    for endpoint in ENDPOINTS + ["all"]:
+        selected = [sample for sample in samples if endpoint == "all" or sample[0] == endpoint]
+        if not selected:
+            continue
+        latencies = sorted(latency for _, latency, _ in selected)
+        summary[endpoint] = {
+            "requests": len(selected),
+            "errors": sum(1 for _, _, ok in selected if not ok),
+            "throughput": len(selected) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000
+        }
+    return summary
+
+def parse_mix(text):
+    """Parse 'generate=6,export=2,providers=2' into endpoint weights."""
+    mix = {}
+    for part in text.split(","):
+        endpoint, _, weight = part.partition("=")
+        if endpoint.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{endpoint}', expected one of {', '.join(ENDPOINTS)}")
+        mix[endpoint.strip()] = float(weight or 1)
+    return mix
+
+def main():
+    """Start the server, run the load and print the report."""
+    parser = argparse.ArgumentParser(description='Load test the web app with the mock AI provider')
+    parser.add_argument('--server', choices=['flask', 'gunicorn'], default='flask',
+                       help='Flask threaded development server, or gunicorn with gunicorn.conf.py (WEB_CONCURRENCY, GUNICORN_THREADS)')
+    parser.add_argument('--url', type=str,
+                       help='Load an already running server instead of starting one (memory is not reported)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run the load')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix("generate=6,export=2,providers=2"),
+                       help='Relative weights of the endpoints (default: generate=6,export=2,providers=2)')
+    parser.add_argument('--mock-delay', type=float, default=0.5, help='Simulated provider response time in seconds')
+    parser.add_argument('--mock-rows', type=int, default=8, help='Test cases per generated table')
+    parser.add_argument('--criteria', type=int, default=5, help='Acceptance criteria per generated story')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the request mix')
+    parser.add_argument('--json', type=str, help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    print("🚀 Web app load test")
+    print("=" * 30)
+
+    process = None
+    sampler = None
+    store_dir = tempfile.mkdtemp(prefix="load_test_")
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            process, base_url = start_server(args.server, free_port(), args.mock_delay, args.mock_rows,
+                                             os.path.join(store_dir, "store.sqlite3"))
+            sampler = MemorySampler(process.pid)
+        print(f"🔧 Server: {base_url} ({args.url and 'external' or args.server}), mock delay {args.mock_delay}s, "
+              f"{args.mock_rows} rows")
+        print(f"🔄 {args.concurrency} clients for {args.duration:.0f}s, mix {args.mix}")
+
+        samples, elapsed = run_load(base_url, args.concurrency, args.duration, args.mix, args.criteria, args.seed)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        for name in os.listdir(store_dir):
+            os.unlink(os.path.join(store_dir, name))
+        os.rmdir(store_dir)
+
+    summary = summarize(samples, elapsed)
+    print()
+    print(f"{'Endpoint':<10} {'Requests':>9} {'Errors':>7} {'Req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in summary.items():
+        print(f"{endpoint:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+    report = {"server": args.url or args.server, "concurrency": args.concurrency, "duration": elapsed,
+              "mock_delay": args.mock_delay, "mock_rows": args.mock_rows, "mix": args.mix, "endpoints": summary}
+    if sampler is not None and sampler.peak is not None:
+        report["memory_mb"] = {key: value / 2 ** 20 for key, value in
+                               (("start", sampler.start), ("peak", sampler.peak), ("end", sampler.end))}
+        print(f"\n📝 Server memory: {report['memory_mb']['start']:.0f} MB at start, "
+              f"{report['memory_mb']['peak']:.0f} MB peak, {report['memory_mb']['end']:.0f} MB at end")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Default location of the store shared by all web worker processes
+DEFAULT_STORE_PATH = os.path.join(tempfile.gettempdir(), "test_case_generator_store.sqlite3")
+
+# Writes (set/incr) per process between purges of expired entries
+PURGE_EVERY = 1000
+
+class SharedStore:
+    """
+    SQLite-backed key/value store shared by every worker process.
+
+    Values are stored as JSON under a (namespace, key) pair with an optional
+    expiry time. Each thread opens its own connection; the database runs in
+    WAL mode so readers never block the single writer. Expired entries are
+    purged every `purge_every` writes, so per-minute rate-limit counters and
+    cached responses do not accumulate in the file.
+    """
+    def __init__(self, path=None, purge_every=PURGE_EVERY):
+        self.path = path or DEFAULT_STORE_PATH
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_updated ON entries (namespace, updated_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key, default=None):
+        """
+        Return the value stored under (namespace, key), or `default` if missing or expired.
+        """
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, namespace, key, value, ttl=None):
+        """
+        Store a JSON-serializable value, optionally expiring after `ttl` seconds.
+        """
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), now + ttl if ttl else None, now)
+        )
+        self._count_write()
+
+    def delete(self, namespace, key):
+        self._connect().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def values(self, namespace, limit=None):
+        """
+        Return the live values of a namespace, oldest first (the newest `limit` if given).
+        """
+        rows = self._connect().execute(
+            "SELECT value FROM entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?) "
+            "ORDER BY updated_at DESC LIMIT ?",
+            (namespace, time.time(), -1 if limit is None else limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def trim(self, namespace, max_entries):
+        """
+        Delete all but the newest `max_entries` entries of a namespace.
+        """
+        self._connect().execute(
+            "DELETE FROM entries WHERE namespace = ? AND key NOT IN "
+            "(SELECT key FROM entries WHERE namespace = ? ORDER BY updated_at DESC LIMIT ?)",
+            (namespace, namespace, max_entries)
+        )
+
+    def incr(self, namespace, key, window):
+        """
+        Increment a counter in the current fixed time window of `window` seconds and return its new value.
+        """
+        now = time.time()
+        window_key = f"{key}:{int(now // window)}"
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO entries (namespace, key, value, expires_at, updated_at) VALUES (?, ?, '1', ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = CAST(value AS INTEGER) + 1, updated_at = excluded.updated_at",
+                (namespace, window_key, now + window, now)
+            )
+            count = conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, window_key)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._count_write()
+        return int(count)
+
+    def _count_write(self):
+        with self._writes_lock:
+            self._writes += 1
+            due = self.purge_every and self._writes % self.purge_every == 0
+        if due:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """
+        Remove expired entries from every namespace.
+        """
+        self._connect().execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
@@ -2,6 +2,11 @@
 class TestCaseGenerator {
     constructor() {
         this.currentResults = null;
+        // Windowed results table: fixed row height, rows fetched a page at a time from /api/results/<id>
+        this.rowHeight = 44;
+        this.pageSize = 100;
+        this.overscan = 10;
+        this.table = null;
         this.init();
     }
 
@@ -54,6 +59,17 @@ class TestCaseGenerator {
             this.updateProviderStatus(e.target.value);
         });
 
+        // Results table scrolling and filters
+        document.getElementById('results-viewport').addEventListener('scroll', () => {
+            this.scheduleTableRender();
+        });
+
+        ['filter-risk', 'filter-priority', 'filter-area'].forEach(id => {
+            document.getElementById(id).addEventListener('change', () => {
+                this.resetResultsTable();
+            });
+        });
+
         // Form inputs for real-time validation
         document.getElementById('user-story').addEventListener('input', () => {
             this.validateForm();
@@ -165,7 +181,8 @@ class TestCaseGenerator {
                     acceptance_criteria: acceptanceCriteria,
                     story_id: storyId,
                     story_title: storyTitle,
-                    ai_provider: aiProvider
+                    ai_provider: aiProvider,
+                    page_size: this.pageSize
                 })
             });
 
@@ -224,6 +241,9 @@ class TestCaseGenerator {
         // Update test cases output
         testCasesOutput.textContent = data.test_cases;
 
+        // Show the parsed test cases in the windowed table
+        this.initResultsTable(data);
+
         // Show results section
         resultsSection.style.display = 'block';
         
@@ -231,6 +251,168 @@ class TestCaseGenerator {
         resultsSection.scrollIntoView({ behavior: 'smooth' });
     }
 
+    initResultsTable(data) {
+        this.table = null;
+        document.getElementById('results-rows').innerHTML = '';
+        document.getElementById('results-spacer').style.height = '0px';
+        document.getElementById('results-count').textContent = '';
+        if (!data.result_id) {
+            return;
+        }
+
+        // Filter choices come from the whole result
+        const facets = data.facets || {};
+        this.fillFilter('filter-risk', 'All risk levels', facets.risk_levels || []);
+        this.fillFilter('filter-priority', 'All priorities', facets.priorities || []);
+        this.fillFilter('filter-area', 'All areas', facets.areas || []);
+
+        this.resetResultsTable(data.result_id, data.total_cases, data.parsed_cases);
+    }
+
+    fillFilter(id, label, values) {
+        const select = document.getElementById(id);
+        select.innerHTML = '';
+        [''].concat(values).forEach(value => {
+            const option = document.createElement('option');
+            option.value = value;
+            option.textContent = value || label;
+            select.appendChild(option);
+        });
+    }
+
+    resetResultsTable(resultId, total, firstPage) {
+        if (!resultId && !this.table) {
+            return;
+        }
+        const filters = {
+            risk_level: document.getElementById('filter-risk').value,
+            priority: document.getElementById('filter-priority').value,
+            area: document.getElementById('filter-area').value
+        };
+        const filtered = Object.values(filters).some(value => value);
+
+        // A new table object makes responses for the previous filters stale
+        this.table = {
+            resultId: resultId || this.table.resultId,
+            filters: filters,
+            total: filtered || total === undefined ? null : total,
+            pages: new Map(),
+            pending: new Set()
+        };
+        if (!filtered && firstPage) {
+            this.table.pages.set(1, firstPage);
+        }
+
+        document.getElementById('results-viewport').scrollTop = 0;
+        if (this.table.total === null) {
+            this.loadTablePage(1);
+        } else {
+            this.updateTableSize();
+            this.renderTableRows();
+        }
+    }
+
+    async loadTablePage(page) {
+        const table = this.table;
+        if (table.pages.has(page) || table.pending.has(page)) {
+            return;
+        }
+        table.pending.add(page);
+
+        const params = new URLSearchParams({ page: page, page_size: this.pageSize });
+        Object.entries(table.filters).forEach(([key, value]) => {
+            if (value) {
+                params.set(key, value);
+            }
+        });
+
+        try {
+            const response = await fetch(`/api/results/${table.resultId}?${params}`);
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || `HTTP ${response.status}`);
+            }
+            if (table !== this.table) {
+                return;
+            }
+            table.pages.set(page, data.test_cases);
+            if (table.total !== data.total) {
+                table.total = data.total;
+                this.updateTableSize();
+            }
+            this.renderTableRows();
+        } catch (error) {
+            console.error('Failed to load results page:', error);
+            this.showNotification(`Failed to load test cases: ${error.message}`, 'error');
+        } finally {
+            table.pending.delete(page);
+        }
+    }
+
+    updateTableSize() {
+        document.getElementById('results-spacer').style.height = `${this.table.total * this.rowHeight}px`;
+        document.getElementById('results-count').textContent = `${this.table.total} test cases`;
+    }
+
+    scheduleTableRender() {
+        if (this.renderFrame) {
+            return;
+        }
+        this.renderFrame = requestAnimationFrame(() => {
+            this.renderFrame = null;
+            this.renderTableRows();
+        });
+    }
+
+    renderTableRows() {
+        const table = this.table;
+        if (!table || table.total === null) {
+            return;
+        }
+
+        // Only the rows in view (plus a few above and below) exist in the DOM
+        const viewport = document.getElementById('results-viewport');
+        const first = Math.max(0, Math.floor(viewport.scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(table.total, Math.ceil((viewport.scrollTop + viewport.clientHeight) / this.rowHeight) + this.overscan);
+
+        const fragment = document.createDocumentFragment();
+        for (let index = first; index < last; index++) {
+            const page = Math.floor(index / this.pageSize) + 1;
+            const rows = table.pages.get(page);
+            if (!rows) {
+                this.loadTablePage(page);
+            }
+            fragment.appendChild(this.createTableRow(rows ? rows[index % this.pageSize] : null));
+        }
+
+        const container = document.getElementById('results-rows');
+        container.style.transform = `translateY(${first * this.rowHeight}px)`;
+        container.replaceChildren(fragment);
+    }
+
+    createTableRow(testCase) {
+        const columns = ['Test Case ID', 'Area/Feature', 'Description', 'Steps', 'Expected Result', 'Risk Level', 'Priority'];
+        const row = document.createElement('div');
+        row.className = 'results-row';
+        if (!testCase) {
+            row.classList.add('loading');
+        } else {
+            const risk = (testCase['Risk Level'] || '').toLowerCase();
+            ['high', 'medium', 'low'].forEach(level => {
+                if (risk.includes(level)) {
+                    row.classList.add(`risk-${level}`);
+                }
+            });
+        }
+        columns.forEach((column, index) => {
+            const cell = document.createElement('span');
+            cell.textContent = testCase ? testCase[column] : (index === 0 ? 'Loading...' : '');
+            cell.title = cell.textContent;
+            row.appendChild(cell);
+        });
+        return row;
+    }
+
     async exportToExcel() {
         if (!this.currentResults) {
             this.showNotification('No test cases to export', 'error');